@@ -1,33 +1,136 @@
+import os
+import re
+import html
 import json
-import base64
 import argparse
+import binascii
+import threading
 import mimetypes
 import urllib.parse
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
+from hashlib import md5
 from pathlib import Path
-import xml.etree.ElementTree as ET
+from typing import Optional
+
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
 
 from gdrive import upload_directory, authenticate_drive
 
+# Writes are handed off to this pool so decoding and hashing of the next
+# resource overlaps with the kernel draining the previous write. The number
+# of writes in flight is capped so decoded payloads can't pile up in memory
+# when decoding outpaces the disk.
+IO_WORKERS = 4
+MAX_PENDING_WRITES = 2 * IO_WORKERS
+_io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS)
+_write_slots = threading.Semaphore(MAX_PENDING_WRITES)
+# O_BINARY keeps Windows from translating newlines in the written bytes
+WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Resources whose base64 text is larger than this are decoded in chunks
+# straight into the output file instead of being materialized in memory.
+STREAM_DECODE_THRESHOLD = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+BASE64_WHITESPACE = b" \t\n\r\v\f"
+
+# BLAKE3 digests are indexed under their own key so they never get mixed
+# up with the MD5 digests recorded by earlier runs.
+HASH_INDEX_KEY = "hash" if blake3 is None else "hash_b3"
+
+TAG_RE = re.compile(r"<[^>]+>")
+
+# Only note texts up to this size are kept in the fingerprint cache
+TEXT_FINGERPRINT_CACHE_LIMIT = 4 * 1024
 
-def load_extraction_log(log_file: Path) -> dict:
+# Exports repeat the same handful of MIME types, so remember their extensions
+guess_extension = lru_cache(maxsize=64)(mimetypes.guess_extension)
+
+LOG_COLUMNS = ("file", "note", "success", "file_path", "notebook", "file_hash", "unchanged", "error")
+
+
+def load_hash_index(index_file: Path, journal_file: Path) -> dict:
     """
-    Load the extraction log from a JSON file.
-    If the log file doesn't exist, create an empty one.
+    Load the hash indexes from a JSON file, then replay the entries an
+    interrupted run journaled after its last save.
 
     Args:
-        log_file (Path): Path to the log file.
+        index_file (Path): Path to the hash index file.
+        journal_file (Path): Path to the hash index journal.
 
     Returns:
-        dict: Parsed log content.
+        dict: Hash indexes keyed by HASH_INDEX_KEY.
+    """
+    hash_indexes = {}
+    if index_file.exists():
+        try:
+            hash_indexes = json.loads(index_file.read_text())
+        except Exception:
+            pass
+
+    if journal_file.exists():
+        with journal_file.open() as f:
+            for line in f:
+                try:
+                    entries = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                for key, file_hashes in entries.items():
+                    hash_index = hash_indexes.setdefault(key, {})
+                    for file_hash, file_path in file_hashes.items():
+                        hash_index.setdefault(file_hash, file_path)
+
+    return hash_indexes
+
+
+def migrate_legacy_log(legacy_file: Path, log_file: Path, index_file: Path) -> None:
     """
-    if not log_file.exists():
-        log_file.write_text("{}")
-        return {}
+    Convert an extraction_log.json written by older versions into the
+    append-only log and the hash index. Only runs before the first
+    append-only log exists.
+
+    Args:
+        legacy_file (Path): Path to the old JSON log.
+        log_file (Path): Path to the append-only JSONL log.
+        index_file (Path): Path to the hash index file.
+    """
+    if log_file.exists() or not legacy_file.exists():
+        return
 
     try:
-        return json.loads(log_file.read_text())
+        legacy_logs = json.loads(legacy_file.read_text())
     except Exception:
-        return {}
+        return
+
+    with log_file.open("w") as f:
+        for notebook_name, rows in legacy_logs.items():
+            if isinstance(rows, list):
+                f.write(json.dumps({"notebook": notebook_name, "rows": rows}, separators=(",", ":")) + "\n")
+
+    if not index_file.exists():
+        # Only hash indexes map strings to strings; anything else is not ours
+        index_file.write_text(json.dumps({
+            key: value for key, value in legacy_logs.items()
+            if isinstance(value, dict) and all(
+                isinstance(file_hash, str) and isinstance(file_path, str)
+                for file_hash, file_path in value.items()
+            )
+        }, separators=(",", ":")))
 
 
 def list_enex_files(input_dir: Path) -> list[Path]:
@@ -40,35 +143,430 @@ def list_enex_files(input_dir: Path) -> list[Path]:
     Returns:
         list[Path]: List of .enex files.
     """
-    return [f for f in input_dir.iterdir() if f.suffix.lower() == ".enex"]
+    return sorted(f for f in input_dir.iterdir() if f.suffix.lower() == ".enex")
+
+
+def new_hasher(data: bytes = b""):
+    """
+    Create a hasher for content fingerprints: BLAKE3 when the package is
+    installed, MD5 otherwise. Neither is used for security, only to spot
+    duplicate files.
+
+    Args:
+        data (bytes): Initial data to hash.
+
+    Returns:
+        Hasher object with update() and hexdigest().
+    """
+    if blake3 is None:
+        return md5(data, usedforsecurity=False)
+    return blake3(data)
+
+
+def hexdigest(hasher) -> str:
+    """
+    Get the hex fingerprint from a hasher created by new_hasher.
+    BLAKE3 digests are truncated to 16 bytes to match the length of MD5.
+
+    Args:
+        hasher: Hasher created by new_hasher.
+
+    Returns:
+        str: Hex digest.
+    """
+    if blake3 is None:
+        return hasher.hexdigest()
+    return hasher.hexdigest(length=16)
+
+
+def write_file(file_path: Path, data: bytes) -> None:
+    """
+    Write bytes straight to a file descriptor, bypassing Python's buffered
+    I/O layer so large resources go out in as few syscalls as possible.
+
+    Args:
+        file_path (Path): Target file.
+        data (bytes): Content to write.
+    """
+    fd = os.open(file_path, WRITE_FLAGS, 0o644)
+    try:
+        write_fd(fd, data)
+    finally:
+        os.close(fd)
+
+
+def submit_write(writes: dict, file_path: Path, data: bytes) -> None:
+    """
+    Queue a file write on the I/O pool, blocking while MAX_PENDING_WRITES
+    writes are already in flight.
+
+    Args:
+        writes (dict): Pending writes keyed by target file path.
+        file_path (Path): Target file.
+        data (bytes): Content to write.
+    """
+    _write_slots.acquire()
+    future = _io_pool.submit(write_file, file_path, data)
+    future.add_done_callback(lambda _: _write_slots.release())
+    writes[file_path] = future
+
+
+def write_fd(fd: int, data: bytes) -> None:
+    """
+    Write all of data to an open file descriptor, retrying on short writes.
+
+    Args:
+        fd (int): Open file descriptor.
+        data (bytes): Content to write.
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def stream_decode(b64_text: str, file_path: Path) -> str:
+    """
+    Decode a large base64 payload chunk by chunk, hashing it and writing it
+    to disk as it goes, so the decoded resource is never held in memory whole.
+    The data goes to a temporary file that only replaces the target once it is
+    fully decoded, so a failure never clobbers an existing file.
+
+    Args:
+        b64_text (str): Base64 encoded resource data.
+        file_path (Path): Target file.
+
+    Returns:
+        str: Hex fingerprint of the decoded data.
+    """
+    file_hash = new_hasher()
+    tmp_path = file_path.with_name(file_path.name + ".part")
+    fd = os.open(tmp_path, WRITE_FLAGS, 0o644)
+
+    try:
+        carry = b""
+        for start in range(0, len(b64_text), STREAM_CHUNK_SIZE):
+            chunk = carry + b64_text[start:start + STREAM_CHUNK_SIZE].encode("ascii").translate(None, BASE64_WHITESPACE)
+            # Only whole 4-character groups can be decoded on their own
+            cut = len(chunk) - len(chunk) % 4
+            chunk, carry = chunk[:cut], chunk[cut:]
+
+            binary_data = base64.b64decode(chunk, validate=False)
+            file_hash.update(binary_data)
+            write_fd(fd, binary_data)
+
+        if carry:
+            raise binascii.Error("Incorrect padding")
+    except Exception:
+        os.close(fd)
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.close(fd)
+    os.replace(tmp_path, file_path)
+    return hexdigest(file_hash)
+
+
+def file_size(file_path: Path) -> Optional[int]:
+    """
+    Get the size of a file, or None if it doesn't exist.
+
+    Args:
+        file_path (Path): File to check.
+
+    Returns:
+        Optional[int]: Size in bytes, or None if the file is missing.
+    """
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return None
+
+
+def decoded_size(b64_text: str) -> int:
+    """
+    Compute the size of base64 data once decoded, without decoding it.
+
+    Args:
+        b64_text (str): Base64 encoded resource data.
+
+    Returns:
+        int: Number of decoded bytes.
+    """
+    length = len(b64_text) - sum(b64_text.count(chr(char)) for char in BASE64_WHITESPACE)
+
+    end = len(b64_text)
+    while end and b64_text[end - 1].isspace():
+        end -= 1
+
+    padding = 0
+    while padding < 2 and end > padding and b64_text[end - 1 - padding] == "=":
+        padding += 1
+
+    return length * 3 // 4 - padding
+
+
+def decode_resource(b64_text: str, file_path: Path, writes: dict) -> str:
+    """
+    Decode a base64 resource, fingerprint it and write it to disk.
+    Small payloads are decoded in one go and handed to the I/O pool before
+    hashing, so the write overlaps with the digest; large ones are streamed
+    straight into the file.
+
+    Args:
+        b64_text (str): Base64 encoded resource data.
+        file_path (Path): Target file.
+        writes (dict): Writes issued this run, keyed by target file path.
+
+    Returns:
+        str: Hex fingerprint of the decoded data.
+    """
+    if len(b64_text) > STREAM_DECODE_THRESHOLD:
+        file_hash = stream_decode(b64_text, file_path)
+        # Streamed files are written synchronously; record them as a finished
+        # write so later notes in this run still see the path as taken
+        written = Future()
+        written.set_result(None)
+        writes[file_path] = written
+        return file_hash
+
+    binary_data = base64.b64decode(b64_text.encode("ascii"), validate=False)
+    submit_write(writes, file_path, binary_data)
+    return hexdigest(new_hasher(binary_data))
+
+
+def new_log_table() -> dict:
+    """
+    Create an empty per-notebook log table.
+    Rows are stored column-wise, one list per field, so large exports don't
+    carry a dictionary per logged file; merge_logs turns them back into rows.
 
+    Returns:
+        dict: Mapping of each log column to an empty list.
+    """
+    return {column: [] for column in LOG_COLUMNS}
+
+
+def append_log_row(table: dict, **row) -> None:
+    """
+    Append a row to a log table. Fields that are not given are stored as None.
+
+    Args:
+        table (dict): Log table created by new_log_table.
+        **row: Field values for the row.
+    """
+    for column in LOG_COLUMNS:
+        table[column].append(row.get(column))
+
+
+def log_rows(table: dict) -> list[dict]:
+    """
+    Transpose a log table back into a list of row dictionaries,
+    leaving out the fields that were not set for a row.
+
+    Args:
+        table (dict): Log table created by new_log_table.
+
+    Returns:
+        list[dict]: Log rows.
+    """
+    return [
+        {column: value for column, value in zip(LOG_COLUMNS, values) if value is not None}
+        for values in zip(*(table[column] for column in LOG_COLUMNS))
+    ]
+
+
+def iter_notes(file: Path):
+    """
+    Stream the note elements of an ENEX file one at a time.
+    Each note is cleared once the caller is done with it, so memory stays
+    bounded by a single note instead of the whole export.
+
+    Args:
+        file (Path): Path to the ENEX file.
+
+    Yields:
+        Element: XML note element.
+    """
+    if HAS_LXML:
+        for _, note in ET.iterparse(str(file), events=("end",), tag="note", huge_tree=True):
+            yield note
+            note.clear()
+            while note.getprevious() is not None:
+                del note.getparent()[0]
+        return
+
+    context = ET.iterparse(file, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == "note":
+            yield elem
+            root.clear()
 
-def process_enex_file(file: Path, output_dir: Path, logs: dict):
+
+def process_enex_file(file: Path, output_dir: Path, indexed_paths: set) -> tuple[dict, dict]:
     """
     Process a single ENEX file and extract its notes.
+    Runs in a worker process, so it only touches its own log dictionary.
 
     Args:
         file (Path): Path to the ENEX file.
         output_dir (Path): Directory to store extracted notes.
-        logs (dict): Log dictionary to store processing metadata.
+        indexed_paths (set): Paths of this notebook already in the hash index.
+
+    Returns:
+        tuple[dict, dict]: Log table for this file's notebook and its hash index.
     """
     notebook_name = file.stem
-    logs[notebook_name] = []
+    table = new_log_table()
+    logs = {notebook_name: table}
+    hash_index = {}
+    writes = {}
 
     try:
-        tree = ET.parse(file)
-        notes = tree.getroot().findall("note")
-    except Exception as e:
-        logs[notebook_name].append({
-            "file": file.name, "error": str(e), "notebook": notebook_name
-        })
+        # Every note lands in this notebook's folder, so create it only once
+        os.makedirs(output_dir / notebook_name, exist_ok=True)
+        for note in iter_notes(file):
+            process_note(note, notebook_name, file, output_dir, logs, writes, hash_index, indexed_paths)
+    except (ET.ParseError, OSError) as e:
+        append_log_row(logs[notebook_name], file=file.name, error=str(e), notebook=notebook_name)
+
+    settle_writes(writes, table, hash_index)
+    return table, hash_index
+
+
+def settle_writes(writes: dict, table: dict, hash_index: dict) -> None:
+    """
+    Wait for pending background writes, mark the log rows of any file that
+    could not be written as failed and drop it from the hash index.
+
+    Args:
+        writes (dict): Pending writes keyed by target file path.
+        table (dict): Log table of the notebook.
+        hash_index (dict): File hash to file path index.
+    """
+    wait(writes.values())
+    failed = {
+        str(file_path): future.exception()
+        for file_path, future in writes.items()
+        if future.exception() is not None
+    }
+    if not failed:
         return
 
-    for note in notes:
-        process_note(note, notebook_name, file, output_dir, logs)
+    for idx, file_path in enumerate(table["file_path"]):
+        error = failed.get(file_path)
+        if error is not None:
+            table["success"][idx] = False
+            table["error"][idx] = f"Write failed: {str(error)}"
+
+    for file_hash in [file_hash for file_hash, file_path in hash_index.items() if file_path in failed]:
+        del hash_index[file_hash]
+
+
+def merge_logs(notebook_name: str, table: dict, file_hashes: dict, hash_indexes: dict, log_file, journal_file) -> None:
+    """
+    Merge the log returned by a worker: fold its hashes into the hash index
+    and append its notebook rows to the extraction log as one JSON line.
+    Hashes are folded in file order and never replace a known path, so
+    duplicates across notebooks resolve the same way on every run.
+    The newly indexed hashes are journaled as well, so an interrupted run
+    doesn't leave logged notebooks missing from the hash index.
+
+    Args:
+        notebook_name (str): Name of the notebook.
+        table (dict): Log table returned by process_enex_file.
+        file_hashes (dict): Hash index returned by process_enex_file.
+        hash_indexes (dict): Hash indexes keyed by HASH_INDEX_KEY.
+        log_file (TextIO): Append-only extraction log.
+        journal_file (TextIO): Append-only hash index journal.
+    """
+    hash_index = hash_indexes.setdefault(HASH_INDEX_KEY, {})
+    added = {}
+    for file_hash, file_path in file_hashes.items():
+        if file_hash not in hash_index:
+            hash_index[file_hash] = added[file_hash] = file_path
+
+    if added:
+        journal_file.write(json.dumps({HASH_INDEX_KEY: added}, separators=(",", ":")) + "\n")
+        journal_file.flush()
+
+    row = {"notebook": notebook_name, "rows": log_rows(table)}
+    log_file.write(json.dumps(row, separators=(",", ":")) + "\n")
+    log_file.flush()
 
 
-def process_note(note, notebook_name, file, output_dir, logs):
+def indexed_paths_by_notebook(hash_index: dict, output_dir: Path) -> dict:
+    """
+    Group the file paths in the hash index by notebook, so each worker only
+    receives the paths of its own notebook.
+
+    Args:
+        hash_index (dict): File hash to file path index.
+        output_dir (Path): Directory the notes are extracted to.
+
+    Returns:
+        dict: Set of indexed file paths for each notebook name.
+    """
+    grouped = {}
+    for file_path in hash_index.values():
+        try:
+            notebook_name = Path(file_path).relative_to(output_dir).parts[0]
+        except ValueError:
+            continue
+        grouped.setdefault(notebook_name, set()).add(file_path)
+    return grouped
+
+
+def open_append_log(log_file: Path):
+    """
+    Open an append-only JSONL log. If an interrupted run left a partial
+    last line, it is terminated first so the next entry starts on a line
+    of its own.
+
+    Args:
+        log_file (Path): Path to the append-only JSONL log.
+
+    Returns:
+        TextIO: Log file opened for appending.
+    """
+    needs_newline = False
+    if log_file.exists() and log_file.stat().st_size:
+        with log_file.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    f = log_file.open("a")
+    if needs_newline:
+        f.write("\n")
+    return f
+
+
+def extract_text(content: str) -> Optional[str]:
+    """
+    Extract the plain text from a note's ENML content.
+    Markup is stripped with a regex rather than building a tree; content with
+    unbalanced angle brackets falls back to the XML parser.
+
+    Args:
+        content (str): ENML content of the note.
+
+    Returns:
+        Optional[str]: Text content, or None if the content can't be parsed.
+    """
+    if content.count("<") == content.count(">"):
+        return html.unescape("\n".join(filter(None, TAG_RE.split(content)))).strip()
+
+    # strip() hands back the same string when there is nothing to trim, and
+    # only lxml needs bytes (it rejects str with an encoding declaration)
+    content = content.strip()
+    try:
+        content_root = ET.fromstring(content.encode() if HAS_LXML else content)
+    except ET.ParseError:
+        return None
+    return "\n".join(content_root.itertext()).strip()
+
+
+def process_note(note, notebook_name, file, output_dir, logs, writes, hash_index, indexed_paths):
     """
     Process a single note: extract text and resources.
 
@@ -78,6 +576,9 @@ def process_note(note, notebook_name, file, output_dir, logs):
         file (Path): Source ENEX file.
         output_dir (Path): Target output directory.
         logs (dict): Log dictionary.
+        writes (dict): Pending writes keyed by target file path.
+        hash_index (dict): File hash to file path index.
+        indexed_paths (set): Paths of this notebook already in the hash index.
     """
     title = note.findtext("title")
     if not title:
@@ -92,27 +593,48 @@ def process_note(note, notebook_name, file, output_dir, logs):
     text_content = None
 
     if content_element is not None and content_element.text is not None:
-        try:
-            content_root = ET.fromstring(content_element.text.strip())
-            text_content = "\n".join(content_root.itertext()).strip()
-        except ET.ParseError:
-            pass
+        text_content = extract_text(content_element.text)
 
     # If there are resources, create a subfolder for the note
     if len(resources) > 0 and text_content:
         note_dir = output_dir / notebook_name / title
+        try:
+            os.mkdir(note_dir)
+        except FileExistsError:
+            pass
     else:
         note_dir = output_dir / notebook_name
 
-    note_dir.mkdir(parents=True, exist_ok=True)
-
     if resources:
-        handle_resources(resources, note_dir, title, file, notebook_name, logs)
+        handle_resources(resources, note_dir, title, file, notebook_name, logs, writes, hash_index, indexed_paths)
 
-    handle_text_content(text_content, note_dir, title, file, notebook_name, logs)
+    handle_text_content(text_content, note_dir, title, file, notebook_name, logs, writes, hash_index, indexed_paths)
 
 
-def handle_text_content(text_content, note_dir, title, file, notebook_name, logs):
+def text_fingerprint(content_bytes: bytes) -> str:
+    """
+    Compute the fingerprint of a note's text.
+    Short texts go through a cache because exports often repeat the same
+    boilerplate (e.g. web clips) across many notes; longer ones are hashed
+    directly so the cache never pins large note bodies in memory.
+
+    Args:
+        content_bytes (bytes): Encoded note text.
+
+    Returns:
+        str: Hex digest.
+    """
+    if len(content_bytes) > TEXT_FINGERPRINT_CACHE_LIMIT:
+        return hexdigest(new_hasher(content_bytes))
+    return cached_text_fingerprint(content_bytes)
+
+
+@lru_cache(maxsize=4096)
+def cached_text_fingerprint(content_bytes: bytes) -> str:
+    return hexdigest(new_hasher(content_bytes))
+
+
+def handle_text_content(text_content, note_dir, title, file, notebook_name, logs, writes, hash_index, indexed_paths):
     """
     Extract and save the plain text content from a note.
 
@@ -123,6 +645,9 @@ def handle_text_content(text_content, note_dir, title, file, notebook_name, logs
         file (Path): ENEX file source.
         notebook_name (str): Name of the notebook.
         logs (dict): Log dictionary.
+        writes (dict): Pending writes keyed by target file path.
+        hash_index (dict): File hash to file path index.
+        indexed_paths (set): Paths of this notebook already in the hash index.
     """
 
     if not text_content:
@@ -130,20 +655,52 @@ def handle_text_content(text_content, note_dir, title, file, notebook_name, logs
 
     file_path = note_dir / f"{title}.txt"
     content_bytes = text_content.encode()
+    existing_size = None if file_path in writes else file_size(file_path)
+    size_matches = existing_size == len(content_bytes)
+
+    if size_matches and str(file_path) in indexed_paths:
+        # Already extracted and indexed by an earlier run
+        append_log_row(
+            logs[notebook_name],
+            file=file.name,
+            note=title,
+            success=True,
+            file_path=str(file_path),
+            notebook=notebook_name,
+            unchanged=True,
+        )
+        return
 
-    if not file_path.exists():
-        file_path.write_bytes(content_bytes)
+    if file_path in writes or (existing_size is not None and not size_matches):
+        # Another note already owns this file name, so its content can't be
+        # fingerprinted as this note's
+        append_log_row(
+            logs[notebook_name],
+            file=file.name,
+            note=title,
+            success=True,
+            file_path=str(file_path),
+            notebook=notebook_name,
+        )
+        return
 
-    logs[notebook_name].append({
-        "file": file.name,
-        "note": title,
-        "success": True,
-        "file_path": str(file_path),
-        "notebook": notebook_name,
-    })
+    # The file is missing, or matches in size but isn't indexed yet (e.g. the
+    # index was lost); write it so the recorded digest describes the file
+    file_hash = text_fingerprint(content_bytes)
+    submit_write(writes, file_path, content_bytes)
+    hash_index.setdefault(file_hash, str(file_path))
+    append_log_row(
+        logs[notebook_name],
+        file=file.name,
+        note=title,
+        success=True,
+        file_path=str(file_path),
+        notebook=notebook_name,
+        file_hash=file_hash,
+    )
 
 
-def handle_resources(resources, note_dir, title, file, notebook_name, logs):
+def handle_resources(resources, note_dir, title, file, notebook_name, logs, writes, hash_index, indexed_paths):
     """
     Extract and save all resources (e.g., images, PDFs) from a note.
 
@@ -154,52 +711,102 @@ def handle_resources(resources, note_dir, title, file, notebook_name, logs):
         file (Path): ENEX source file.
         notebook_name (str): Name of the notebook.
         logs (dict): Log dictionary.
+        writes (dict): Pending writes keyed by target file path.
+        hash_index (dict): File hash to file path index.
+        indexed_paths (set): Paths of this notebook already in the hash index.
     """
     for idx, res in enumerate(resources):
-        data_element = res.find("data")
-        mime_element = res.find("mime")
+        # Index the children in one pass instead of scanning once per lookup
+        children = {child.tag: child for child in res}
+        data_element = children.get("data")
+        mime_element = children.get("mime")
 
         if data_element is None or mime_element is None:
             continue
 
         mime_type = mime_element.text
         if not mime_type or not data_element.text:
-            logs[notebook_name].append({
-                "file": file.name,
-                "note": title,
-                "success": False,
-                "notebook": notebook_name,
-                "error": "Missing mime type or resource data"
-            })
+            append_log_row(
+                logs[notebook_name],
+                file=file.name,
+                note=title,
+                success=False,
+                notebook=notebook_name,
+                error="Missing mime type or resource data",
+            )
             continue
 
         # Guess file extension from MIME type
-        extension = mimetypes.guess_extension(mime_type, strict=True) or ""
+        extension = guess_extension(mime_type, strict=True) or ""
         file_name = f"{title}_{idx + 1}{extension}" if len(resources) > 1 else f"{title}{extension}"
         file_path = note_dir / file_name
 
+        b64_text = data_element.text
+        existing_size = None if file_path in writes else file_size(file_path)
+        size_matches = existing_size is not None and existing_size == decoded_size(b64_text)
+
+        if size_matches and str(file_path) in indexed_paths:
+            # Already extracted and indexed by an earlier run, skip decoding altogether
+            append_log_row(
+                logs[notebook_name],
+                file=file.name,
+                note=title,
+                success=True,
+                file_path=str(file_path),
+                notebook=notebook_name,
+                unchanged=True,
+            )
+            continue
+
+        if file_path in writes or (existing_size is not None and not size_matches):
+            # Another note already owns this file name; it is left alone and
+            # there is no point decoding data that won't be written
+            append_log_row(
+                logs[notebook_name],
+                file=file.name,
+                note=title,
+                success=True,
+                file_path=str(file_path),
+                notebook=notebook_name,
+            )
+            continue
+
+        # The file is missing, or matches in size but isn't indexed yet (e.g.
+        # the index was lost or the hash algorithm changed); decode and write
+        # it again so the recorded digest describes the file
         try:
-            binary_data = base64.b64decode(data_element.text)
+            file_hash = decode_resource(b64_text, file_path, writes)
+        except OSError as e:
+            append_log_row(
+                logs[notebook_name],
+                file=file.name,
+                note=title,
+                success=False,
+                notebook=notebook_name,
+                error=f"Write failed: {str(e)}",
+            )
+            continue
         except Exception as e:
-            logs[notebook_name].append({
-                "file": file.name,
-                "note": title,
-                "success": False,
-                "notebook": notebook_name,
-                "error": f"Base64 decoding failed: {str(e)}"
-            })
+            append_log_row(
+                logs[notebook_name],
+                file=file.name,
+                note=title,
+                success=False,
+                notebook=notebook_name,
+                error=f"Base64 decoding failed: {str(e)}",
+            )
             continue
 
-        if not file_path.exists():
-            file_path.write_bytes(binary_data)
-
-        logs[notebook_name].append({
-            "file": file.name,
-            "note": title,
-            "success": True,
-            "file_path": str(file_path),
-            "notebook": notebook_name,
-        })
+        hash_index.setdefault(file_hash, str(file_path))
+        append_log_row(
+            logs[notebook_name],
+            file=file.name,
+            note=title,
+            success=True,
+            file_path=str(file_path),
+            notebook=notebook_name,
+            file_hash=file_hash,
+        )
 
 
 def process_files(output_directory: Path, dry_run: bool) -> None:
@@ -215,8 +822,11 @@ def process_files(output_directory: Path, dry_run: bool) -> None:
         print("[INFO] Dry run mode enabled — Google Drive syncing will be skipped.")
 
     input_directory = Path("./input_data")
-    extraction_log_file = Path("./extraction_log.json")
-    logs_json = load_extraction_log(extraction_log_file)
+    extraction_log_file = Path("./extraction_log.jsonl")
+    hash_index_file = Path("./hash_index.json")
+    hash_journal_file = Path("./hash_index.journal.jsonl")
+    migrate_legacy_log(Path("./extraction_log.json"), extraction_log_file, hash_index_file)
+    hash_indexes = load_hash_index(hash_index_file, hash_journal_file)
 
     if not input_directory.exists():
         raise FileNotFoundError("Input directory does not exist")
@@ -228,10 +838,21 @@ def process_files(output_directory: Path, dry_run: bool) -> None:
         print("No ENEX files found.")
         return
 
-    for file in files:
-        process_enex_file(file, output_directory, logs_json)
+    with ProcessPoolExecutor() as executor, open_append_log(extraction_log_file) as log_file, \
+            open_append_log(hash_journal_file) as journal_file:
+        indexed_paths = indexed_paths_by_notebook(hash_indexes.get(HASH_INDEX_KEY, {}), output_directory)
+        results = executor.map(
+            process_enex_file,
+            files,
+            [output_directory] * len(files),
+            [indexed_paths.get(file.stem, set()) for file in files],
+        )
+        for file, (table, file_hashes) in zip(files, results):
+            merge_logs(file.stem, table, file_hashes, hash_indexes, log_file, journal_file)
 
-    finalize_logs(logs_json, extraction_log_file)
+    # The saved index now holds every journaled entry
+    save_hash_index(hash_indexes, hash_index_file)
+    hash_journal_file.unlink(missing_ok=True)
 
     if dry_run:
         print("Dry run complete. No files were uploaded.")
@@ -239,8 +860,11 @@ def process_files(output_directory: Path, dry_run: bool) -> None:
         service_account = authenticate_drive()
         upload_directory(service_account, output_directory)
 
-def finalize_logs(logs_json: dict, log_file: Path):
-    log_file.write_text(json.dumps(logs_json, indent=4))
+def save_hash_index(hash_indexes: dict, index_file: Path):
+    # Write to a temporary file first so a crash never leaves a truncated index
+    temp_file = index_file.with_name(index_file.name + ".tmp")
+    temp_file.write_text(json.dumps(hash_indexes, separators=(",", ":")))
+    os.replace(temp_file, index_file)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -0,0 +1,81 @@
+import json
+import argparse
+from pathlib import Path
+
+
+def rebuild_log(log_file: Path, index_file: Path) -> dict:
+    """
+    Rebuild a single extraction log from the append-only log and the hash
+    index. The latest run of each notebook wins. Notebooks are kept under
+    their own key so a notebook can't clash with a hash index name.
+
+    Args:
+        log_file (Path): Path to the append-only JSONL log.
+        index_file (Path): Path to the hash index file.
+
+    Returns:
+        dict: Hash indexes and the logged rows of each notebook.
+    """
+    logs = {"hash_indexes": {}, "notebooks": {}}
+    if index_file.exists():
+        logs["hash_indexes"] = json.loads(index_file.read_text())
+
+    if not log_file.exists():
+        return logs
+
+    with log_file.open() as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A run that was interrupted may leave a partial last line
+                continue
+            logs["notebooks"][entry["notebook"]] = entry["rows"]
+
+    return logs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Extraction Log Rebuilder",
+        description=(
+            "Rebuilds a single JSON view of the extraction log from the "
+            "append-only log and hash index written by the migrator."
+        )
+    )
+
+    parser.add_argument(
+        "-l", "--log-file",
+        type=Path,
+        default=Path("./extraction_log.jsonl"),
+        help="Append-only extraction log (default: ./extraction_log.jsonl)"
+    )
+
+    parser.add_argument(
+        "-i", "--index-file",
+        type=Path,
+        default=Path("./hash_index.json"),
+        help="Hash index file (default: ./hash_index.json)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        # Not extraction_log.json, which the migrator would take for a legacy log
+        default=Path("./extraction_log_view.json"),
+        help="Where to write the rebuilt log (default: ./extraction_log_view.json)"
+    )
+
+    parser.add_argument(
+        "-p", "--pretty-log",
+        action="store_true",
+        help="Indent the rebuilt log for reading (slower on large logs)"
+    )
+
+    args = parser.parse_args()
+    logs = rebuild_log(args.log_file, args.index_file)
+
+    if args.pretty_log:
+        args.output.write_text(json.dumps(logs, indent=4))
+    else:
+        args.output.write_text(json.dumps(logs, separators=(",", ":")))